@@ -2,11 +2,19 @@
 
 from fastapi import FastAPI, HTTPException
 from fastapi.openapi.utils import get_openapi
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Annotated, NamedTuple, Optional
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import hashlib
+import json
+import os
+import queue
 import uvicorn
 import torch
-from transformers import pipeline
+from transformers import AutoModelForSeq2SeqLM, AutoTokenizer, TextIteratorStreamer
 import time
 from datetime import datetime
 
@@ -15,6 +23,7 @@ app = FastAPI(
     title = "Russian News Summarizer API",
     version = "1.0.0",
     description = "API для автоматической суммаризации русскоязычных новостей",
+    default_response_class = ORJSONResponse,  # Быстрая сериализация JSON через orjson
 )
 
 # Модель для входных данных запроса
@@ -23,7 +32,7 @@ class SummarizeRequest(BaseModel):
         ...,
         min_length = 50,
         max_length = 5000,
-        example = "Россия запустила новую ракету в космос. Это важное достижение.",
+        json_schema_extra = {"example": "Россия запустила новую ракету в космос. Это важное достижение."},
         description = "Текст новости для суммаризации"
     )
     max_length: Optional[int] = Field(
@@ -33,6 +42,21 @@ class SummarizeRequest(BaseModel):
         description = "Максимальная длина суммаризации в символах"
     )
 
+# Модель для входных данных пакетного запроса
+class BatchRequest(BaseModel):
+    texts: list[Annotated[str, Field(min_length = 50, max_length = 5000)]] = Field(
+        ...,
+        min_length = 1,
+        max_length = 64,
+        description = "Тексты новостей для суммаризации (до 64 штук)"
+    )
+    max_length: Optional[int] = Field(
+        100,
+        ge = 30,
+        le = 300,
+        description = "Максимальная длина каждой суммаризации в символах"
+    )
+
 # Модель для выходных данных ответа
 class SummarizeResponse(BaseModel):
     summary: str = Field(..., description = "Результат суммаризации")
@@ -43,8 +67,488 @@ class SummarizeResponse(BaseModel):
     model_used: str = Field(..., description = "Использованная модель")
     timestamp: str = Field(..., description = "Временная метка")
 
-# Глобальная переменная для модели
-summarizer = None
+# Название модели суммаризации
+MODEL_NAME = "IlyaGusev/rut5_base_sum_gazeta"
+
+# Использование CTranslate2 вместо модели transformers. Модель конвертируется заранее командой:
+# ct2-transformers-converter --model IlyaGusev/rut5_base_sum_gazeta --quantization int8_float16 --output_dir models/rut5_ct2
+USE_CT2 = os.getenv("USE_CT2", "1") == "1"
+CT2_MODEL_DIR = os.getenv("CT2_MODEL_DIR", "models/rut5_ct2")
+
+# Компиляция модели transformers через torch.compile при старте сервера (только GPU, по умолчанию выключена)
+COMPILE_MODEL = os.getenv("COMPILE_MODEL", "0") == "1"
+
+# Текст для прогревочного прогона модели перед приемом запросов
+WARMUP_TEXT = "Россия запустила новую ракету в космос. Это важное достижение."
+
+# Освобождение неиспользуемой памяти кэширующего аллокатора CUDA после инференса.
+# Позволяет разместить на GPU больше моделей ценой небольшой задержки на каждый вызов.
+CLEAN_CACHE = os.getenv("CLEAN_CACHE", "0") == "1"
+CLEAN_CACHE_THRESHOLD = int(os.getenv("CLEAN_CACHE_THRESHOLD", str(1 << 30)))  # Порог неиспользуемой памяти в байтах
+cache_cleanings = 0  # Число выполненных очисток кэша CUDA
+
+# Число потоков вычислений на один процесс. При нескольких воркерах uvicorn
+# значение стоит уменьшать, чтобы суммарно потоков было не больше числа ядер.
+TORCH_THREADS = int(os.getenv("TORCH_THREADS", "4"))
+
+# Максимальная длина входного текста в токенах, более длинные тексты усекаются
+MAX_INPUT_TOKENS = 1024
+
+# Глобальные переменные для модели
+model = None  # Модель transformers (резервный вариант)
+translator = None  # Модель CTranslate2
+tokenizer = None  # Токенизатор модели, общий для обоих вариантов
+
+def clean_cuda_cache():
+    # Освобождает кэш CUDA, если зарезервированная, но не занятая память превышает порог.
+    
+    global cache_cleanings
+    
+    if not CLEAN_CACHE or not torch.cuda.is_available():
+        return
+    
+    if torch.cuda.memory_reserved() - torch.cuda.memory_allocated() > CLEAN_CACHE_THRESHOLD:
+        torch.cuda.empty_cache()
+        cache_cleanings += 1
+
+def to_model_device(inputs):
+    # Переносит тензоры входа на устройство модели. На GPU копирование идет асинхронно из закрепленной памяти.
+    
+    if model.device.type == "cuda":
+        return {name: tensor.pin_memory().to(model.device, non_blocking = True) for name, tensor in inputs.items()}
+    
+    return dict(inputs)
+
+def encode_text(text):
+    """
+    Токенизация текста в идентификаторы токенов.
+    Все обращения к Rust-токенизатору идут через эту функцию с одинаковыми
+    параметрами (усечение до MAX_INPUT_TOKENS без паддинга), поэтому его внутреннее состояние
+    не переключается и вызовы из разных потоков не конфликтуют.
+    Паддинг батча выполняется отдельно через tokenizer.pad.
+    
+    Args:
+        text (str): Исходный текст
+        
+    Returns:
+        list[int]: Идентификаторы токенов
+    """
+    
+    return tokenizer(text, truncation = True, max_length = MAX_INPUT_TOKENS)["input_ids"]
+
+def batch_inputs(input_ids):
+    # Дополняет токенизированные тексты паддингом до самого длинного и переносит на устройство модели.
+    
+    return to_model_device(tokenizer.pad({"input_ids": input_ids}, return_tensors = "pt"))
+
+def model_loaded():
+    # Проверяет, загружена ли модель хотя бы в одном из вариантов.
+    
+    return model is not None or translator is not None
+
+# Минимальная длина генерируемой суммаризации в токенах
+MIN_SUMMARY_TOKENS = 20
+
+# Параметры генерации модели transformers: жадное декодирование с KV-кэшем
+# вместо beam search из конфигурации модели
+GEN_KWARGS = {
+    "min_length": MIN_SUMMARY_TOKENS,
+    "num_beams": 1,
+    "do_sample": False,
+    "use_cache": True,
+}
+
+# Параметры микро-батчинга запросов
+MAX_BATCH = int(os.getenv("MAX_BATCH", "8"))  # Максимальный размер батча
+BATCH_TIMEOUT = 0.005  # Окно ожидания следующего запроса в секундах
+LENGTH_BUCKET = 8  # Шаг округления max_length для объединения запросов в батч
+MAX_LENGTH_RATIO = 1.3  # Допустимое отношение длин самого длинного и самого короткого текста в батче
+MAX_WAIT = 0.05  # Максимальное время, на которое неполный батч откладывается до следующего окна
+
+# Максимальный размер батча для эндпоинта /summarize_batch. Ограничивается только памятью устройства.
+BATCH_REQUEST_SIZE = int(os.getenv("BATCH_REQUEST_SIZE", "64"))
+
+# Пул потоков для блокирующих вызовов модели, чтобы не останавливать цикл событий.
+# Один поток соответствует одному GPU: модель обрабатывает батчи последовательно.
+INFER_POOL = ThreadPoolExecutor(max_workers = int(os.getenv("INFER_WORKERS", "1")))
+
+# Очередь запросов на суммаризацию и фоновая задача, которая ее обрабатывает
+request_queue = None
+batch_task = None
+
+# Запрос, ожидающий формирования батча
+class PendingRequest(NamedTuple):
+    input_ids: list  # Токенизированный текст
+    enqueued_at: float  # Момент постановки в очередь
+    max_length: int
+    future: asyncio.Future
+
+def bucket_max_length(max_length):
+    # Округляет длину суммаризации (в словах) вниз до LENGTH_BUCKET, чтобы запросы с близкими параметрами попадали в один батч.
+    # Округление вниз не удлиняет суммаризацию сверх запрошенной; нижняя граница - минимальная длина генерации.
+    
+    bucket = min(100, max_length) // LENGTH_BUCKET * LENGTH_BUCKET
+    return max(MIN_SUMMARY_TOKENS, bucket)
+
+def form_batches(pending, flush):
+    """
+    Разбиение ожидающих запросов на батчи близкой длины.
+    Запросы сортируются по числу токенов, и батч закрывается, как только
+    отношение длин превышает MAX_LENGTH_RATIO, поэтому паддинг до самого
+    длинного текста в батче остается небольшим.
+    
+    Args:
+        pending (list[PendingRequest]): Запросы, ожидающие обработки
+        flush (bool): Отправить все батчи, включая неполные
+        
+    Returns:
+        tuple: Список готовых батчей и список отложенных запросов
+    """
+    
+    now = time.monotonic()
+    ready, remainder = [], []
+    
+    # Одна генерация - одна длина суммаризации
+    groups = {}
+    for entry in pending:
+        groups.setdefault(entry.max_length, []).append(entry)
+    
+    for entries in groups.values():
+        entries.sort(key = lambda entry: len(entry.input_ids))
+        
+        batches = [[]]
+        for entry in entries:
+            batch = batches[-1]
+            if batch and (len(batch) == MAX_BATCH or len(entry.input_ids) > len(batch[0].input_ids) * MAX_LENGTH_RATIO):
+                batches.append([entry])
+            else:
+                batch.append(entry)
+        
+        for batch in batches:
+            # Неполный батч откладываем до следующего окна, если запросы еще продолжают поступать
+            waited = now - min(entry.enqueued_at for entry in batch)
+            if flush or len(batch) == MAX_BATCH or waited >= MAX_WAIT:
+                ready.append(batch)
+            else:
+                remainder.extend(batch)
+    
+    return ready, remainder
+
+def generate_summaries(input_ids, max_length):
+    """
+    Суммаризация списка текстов одним вызовом модели.
+    Использует CTranslate2, если модель загружена, иначе модель transformers.
+    
+    Args:
+        input_ids (list[list[int]]): Токенизированные тексты (см. encode_text)
+        max_length (int): Максимальная длина суммаризации в токенах
+        
+    Returns:
+        list[str]: Суммаризации в порядке входных текстов
+    """
+    
+    if translator is not None:
+        # Преобразуем идентификаторы в строковые токены, которые принимает CTranslate2
+        sources = [tokenizer.convert_ids_to_tokens(ids) for ids in input_ids]
+        
+        results = translator.translate_batch(
+            sources,
+            max_decoding_length = max_length,
+            min_decoding_length = MIN_SUMMARY_TOKENS,
+            beam_size = 1,
+        )
+        
+        return [
+            tokenizer.decode(tokenizer.convert_tokens_to_ids(result.hypotheses[0]), skip_special_tokens = True)
+            for result in results
+        ]
+    
+    # Вызываем generate напрямую на уже токенизированных текстах.
+    # Батч дополняется паддингом только до самого длинного текста.
+    inputs = batch_inputs(input_ids)
+    
+    outputs = model.generate(
+        **inputs,
+        max_length = max_length,
+        **GEN_KWARGS,
+    )
+    clean_cuda_cache()
+    
+    return tokenizer.batch_decode(outputs, skip_special_tokens = True)
+
+def stream_summary(text, max_length):
+    """
+    Потоковая суммаризация текста.
+    Генерирует события Server-Sent Events с фрагментами текста по мере декодирования.
+    Генерация выполняется в пуле модели, а фрагменты передаются через очередь.
+    При ошибке генерации последним отправляется событие error.
+    
+    Args:
+        text (str): Текст для суммаризации
+        max_length (int): Максимальная длина суммаризации в токенах
+        
+    Yields:
+        str: Событие SSE с JSON-строкой очередного фрагмента
+    """
+    
+    input_ids = encode_text(text)
+    
+    if translator is not None:
+        pieces = queue.Queue()
+        
+        def generate():
+            try:
+                steps = translator.generate_tokens(
+                    tokenizer.convert_ids_to_tokens(input_ids),
+                    max_decoding_length = max_length,
+                    min_decoding_length = MIN_SUMMARY_TOKENS,
+                )
+                
+                # Декодируем накопленные токены целиком, чтобы корректно восстанавливать пробелы
+                token_ids = []
+                sent = ""
+                for step in steps:
+                    token_ids.append(step.token_id)
+                    decoded = tokenizer.decode(token_ids, skip_special_tokens = True)
+                    if len(decoded) > len(sent):
+                        pieces.put(decoded[len(sent):])
+                        sent = decoded
+            finally:
+                # Завершаем поток и при ошибке генерации, чтобы клиент не ждал бесконечно
+                pieces.put(None)
+        
+        stream = iter(pieces.get, None)
+        
+    else:
+        pieces = TextIteratorStreamer(tokenizer, skip_special_tokens = True)
+        inputs = batch_inputs([input_ids])
+        
+        def generate():
+            try:
+                model.generate(
+                    **inputs,
+                    max_length = max_length,
+                    streamer = pieces,
+                    **GEN_KWARGS,
+                )
+                clean_cuda_cache()
+            finally:
+                # Завершаем поток и при ошибке генерации, чтобы клиент не ждал бесконечно
+                pieces.end()
+        
+        stream = pieces
+    
+    # Генерация выполняется в пуле модели, а фрагменты читаются по мере готовности
+    generation = INFER_POOL.submit(generate)
+    
+    for piece in stream:
+        if piece:
+            yield f"data: {json.dumps(piece, ensure_ascii = False)}\n\n"
+    
+    # Поток фрагментов закончился - проверяем, не завершилась ли генерация ошибкой
+    error = generation.exception()
+    if error is not None:
+        print(f"Ошибка при потоковой суммаризации: {error!r}")
+        yield f"event: error\ndata: {json.dumps(f'Ошибка при обработке текста: {error}', ensure_ascii = False)}\n\n"
+
+async def run_batch(batch):
+    # Выполняет суммаризацию одного батча в пуле потоков и передает результаты ожидающим запросам.
+    
+    try:
+        summaries = await asyncio.get_running_loop().run_in_executor(
+            INFER_POOL,
+            generate_summaries,
+            [entry.input_ids for entry in batch],
+            batch[0].max_length,
+        )
+        
+        for entry, summary in zip(batch, summaries):
+            if not entry.future.done():
+                entry.future.set_result(summary)
+                
+    except Exception as e:
+        # Ошибка модели передается каждому запросу из батча
+        for entry in batch:
+            if not entry.future.done():
+                entry.future.set_exception(e)
+
+async def batch_worker():
+    """
+    Фоновая задача микро-батчинга.
+    Собирает запросы, пришедшие в течение короткого окна, группирует их
+    по длине и выполняет каждую группу одним вызовом модели.
+    """
+    
+    pending = []
+    
+    def enqueue(item):
+        text, max_length, future = item
+        try:
+            pending.append(PendingRequest(encode_text(text), time.monotonic(), max_length, future))
+        except Exception as e:
+            # Ошибка токенизации затрагивает только этот запрос, обработчик продолжает работу
+            if not future.done():
+                future.set_exception(e)
+    
+    try:
+        while True:
+            # Если отложенных запросов нет, ждем первый запрос без ограничения по времени
+            if not pending:
+                enqueue(await request_queue.get())
+            
+            # Добираем запросы, пока они приходят в пределах окна
+            flush = False
+            while True:
+                try:
+                    enqueue(await asyncio.wait_for(request_queue.get(), timeout = BATCH_TIMEOUT))
+                except asyncio.TimeoutError:
+                    # Новых запросов нет - ждать дальше бессмысленно
+                    flush = True
+                    break
+                
+                if len(pending) >= MAX_BATCH * 4:
+                    break
+            
+            batches, pending = form_batches(pending, flush)
+            
+            for batch in batches:
+                await run_batch(batch)
+    
+    finally:
+        # При остановке обработчика отложенные запросы не должны ждать ответа бесконечно
+        for entry in pending:
+            if not entry.future.done():
+                entry.future.set_exception(RuntimeError("Обработчик очереди запросов остановлен"))
+
+def on_batch_task_done(task):
+    # Сообщает об аварийной остановке обработчика очереди и завершает запросы, оставшиеся в очереди.
+    
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Обработчик очереди запросов остановлен из-за ошибки: {task.exception()!r}")
+    
+    while not request_queue.empty():
+        _, _, future = request_queue.get_nowait()
+        if not future.done():
+            future.set_exception(RuntimeError("Обработчик очереди запросов остановлен"))
+
+def service_ready():
+    # Сервис готов, если модель загружена и обработчик очереди запросов работает.
+    
+    return model_loaded() and batch_task is not None and not batch_task.done()
+
+# Кэш суммаризаций для повторяющихся текстов (LRU)
+CACHE_SIZE = int(os.getenv("CACHE_SIZE", "10000"))  # Максимальное число записей в кэше
+summary_cache = OrderedDict()
+cache_hits = 0  # Число ответов, выданных из кэша
+
+def cache_key(text, max_length):
+    # Ключ кэша: хэш текста и длина суммаризации, с которой он обрабатывался.
+    
+    return hashlib.blake2b(text.encode(), digest_size = 16).digest() + max_length.to_bytes(2, "little")
+
+def cache_get(key):
+    # Возвращает суммаризацию из кэша или None. Обращения к кэшу не содержат await, поэтому выполняются в цикле событий атомарно.
+    
+    global cache_hits
+    
+    cached = summary_cache.get(key)
+    if cached is not None:
+        summary_cache.move_to_end(key)
+        cache_hits += 1
+    
+    return cached
+
+def cache_put(key, summary):
+    # Сохраняет суммаризацию в кэш, вытесняя самые давние записи.
+    
+    summary_cache[key] = summary
+    if len(summary_cache) > CACHE_SIZE:
+        summary_cache.popitem(last = False)
+
+def is_passthrough(text, max_length):
+    # Короткий текст не сжать: суммаризация оказалась бы не короче исходника.
+    
+    approx_tokens = len(text) // 4
+    return len(text) <= max_length or approx_tokens < MIN_SUMMARY_TOKENS + 10
+
+def build_response(text, summary, processing_time, model_used):
+    # Формирует ответ в виде словаря со схемой SummarizeResponse. Эндпоинты возвращают его
+    # через ORJSONResponse напрямую, поэтому FastAPI не валидирует значения, вычисленные сервером.
+    
+    original_length = len(text)
+    summary_length = len(summary)
+    compression_ratio = original_length / max(summary_length, 1)
+    
+    return {
+        "summary": summary,
+        "original_length": original_length,
+        "summary_length": summary_length,
+        "compression_ratio": round(compression_ratio, 2),
+        "processing_time": round(processing_time, 3),
+        "model_used": model_used,
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+async def summarize_text(text, max_length, start_time):
+    """
+    Суммаризация одного текста с учетом кэша и коротких текстов.
+    Текст ставится в очередь микро-батчинга, поэтому одновременные вызовы
+    объединяются в общие батчи.
+    
+    Args:
+        text (str): Текст для суммаризации
+        max_length (int): Максимальная длина суммаризации в символах
+        start_time (float): Момент начала обработки запроса (time.perf_counter)
+        
+    Returns:
+        dict: Ответ со схемой SummarizeResponse
+    """
+    
+    if is_passthrough(text, max_length):
+        return build_response(text, text, time.perf_counter() - start_time, "passthrough")
+    
+    max_length = bucket_max_length(max_length // 3)  # Преобразуем символы в слова
+    
+    # Берем суммаризацию из кэша, если такой текст уже обрабатывался. Ответ формируется заново,
+    # чтобы время обработки и временная метка относились к текущему запросу.
+    key = cache_key(text, max_length)
+    cached = cache_get(key)
+    if cached is not None:
+        return build_response(text, cached, time.perf_counter() - start_time, "rut5_base_sum_gazeta")
+    
+    # Ставим запрос в очередь микро-батчинга и ждем результат
+    future = asyncio.get_running_loop().create_future()
+    await request_queue.put((text, max_length, future))
+    summary = await future
+    cache_put(key, summary)
+    
+    return build_response(text, summary, time.perf_counter() - start_time, "rut5_base_sum_gazeta")
+
+def summarize_many(texts, max_length):
+    """
+    Суммаризация списка текстов минимальным числом вызовов модели.
+    Тексты сортируются по длине и разбиваются на батчи по BATCH_REQUEST_SIZE,
+    поэтому запрос из 64 текстов по умолчанию выполняется одним вызовом generate.
+    Выполняется в пуле инференса.
+    
+    Args:
+        texts (list[str]): Тексты для суммаризации
+        max_length (int): Максимальная длина суммаризации в токенах
+        
+    Returns:
+        list[str]: Суммаризации в порядке входных текстов
+    """
+    
+    input_ids = [encode_text(text) for text in texts]
+    order = sorted(range(len(texts)), key = lambda i: len(input_ids[i]))
+    summaries = [None] * len(texts)
+    
+    for start in range(0, len(order), BATCH_REQUEST_SIZE):
+        chunk = order[start:start + BATCH_REQUEST_SIZE]
+        for i, summary in zip(chunk, generate_summaries([input_ids[i] for i in chunk], max_length)):
+            summaries[i] = summary
+    
+    return summaries
 
 def custom_openapi():
   
@@ -81,11 +585,66 @@ def custom_openapi():
 # Применяем кастомизированную схему к приложению
 app.openapi = custom_openapi
 
+def warmup_shapes():
+    """
+    Прогревочные прогоны модели перед приемом запросов.
+    Модель запускается на одиночном и полном батче с коротким и длинным входом,
+    чтобы torch.compile (если включен) построил граф с динамическими размерами
+    до приема запросов. Это сокращает, но не исключает перекомпиляции во время
+    работы: длина KV-кэша декодера меняется на каждом шаге генерации.
+    Используется максимальная длина суммаризации.
+    """
+    
+    short_ids = encode_text(WARMUP_TEXT)
+    long_ids = encode_text(" ".join([WARMUP_TEXT] * 16))
+    
+    for batch_size in (1, MAX_BATCH):
+        for input_ids in (short_ids, long_ids):
+            generate_summaries([input_ids] * batch_size, bucket_max_length(100))
+
+async def warmup_model():
+    # Прогревает модель в пуле инференса. Если скомпилированная модель не работает, возвращает обычный forward, а при повторной ошибке помечает модель незагруженной.
+    
+    global model, translator
+    
+    loop = asyncio.get_running_loop()
+    
+    try:
+        await loop.run_in_executor(INFER_POOL, warmup_shapes)
+        print("Прогрев модели завершен")
+        return
+    except Exception as e:
+        print(f"Ошибка при прогреве модели: {e}")
+    
+    # Удаляем скомпилированный forward, установленный на экземпляре, чтобы вернуться к методу класса
+    if model is not None and "forward" in vars(model):
+        del model.forward
+        
+        try:
+            await loop.run_in_executor(INFER_POOL, warmup_shapes)
+            print("Прогрев завершен, модель работает без torch.compile")
+            return
+        except Exception as e:
+            print(f"Ошибка при прогреве модели без компиляции: {e}")
+    
+    # Модель не смогла выполнить инференс - не принимаем запросы, которые завершатся ошибкой
+    model = None
+    translator = None
+
 @app.on_event("startup")
 async def startup_event():
     # Загрузка модели при запуске приложения. Выполняется один раз при старте сервера.
     
-    global summarizer
+    global model, translator, tokenizer, request_queue, batch_task
+    
+    # Запускаем обработчик очереди запросов
+    request_queue = asyncio.Queue()
+    batch_task = asyncio.create_task(batch_worker())
+    batch_task.add_done_callback(on_batch_task_done)
+    
+    # Ограничиваем число потоков, чтобы воркеры не конкурировали за ядра
+    torch.set_num_threads(TORCH_THREADS)
+    torch.set_num_interop_threads(1)
     
     print("Начинаем загрузку модели...")
     
@@ -96,19 +655,73 @@ async def startup_event():
         
         print(f"Используемое устройство: {device_name}")
         
-        # Загружаем модель суммаризации
-        summarizer = pipeline(
-            "summarization",
-            model = "IlyaGusev/rut5_base_sum_gazeta",
-            device = device,
-            framework = "pt"
-        )
-        
-        print("Модель успешно загружена")
+        if USE_CT2 and os.path.isdir(CT2_MODEL_DIR):
+            # Загружаем сконвертированную модель CTranslate2
+            import ctranslate2
+            
+            tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+            translator = ctranslate2.Translator(
+                CT2_MODEL_DIR,
+                device = "cuda" if device == 0 else "cpu",
+                compute_type = "int8_float16" if device == 0 else "int8",
+                intra_threads = TORCH_THREADS,
+            )
+            
+            print("Модель CTranslate2 успешно загружена")
+            
+        else:
+            if USE_CT2:
+                print(f"Модель CTranslate2 не найдена в {CT2_MODEL_DIR}, используем модель transformers")
+            
+            # Загружаем модель суммаризации: на GPU сразу в FP16, на CPU в FP32 для последующей квантизации
+            tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+            # Паддинг через tokenizer.pad используется намеренно (см. encode_text), отключаем предупреждение об этом
+            tokenizer.deprecation_warnings["Asking-to-pad-a-fast-tokenizer"] = True
+            model = AutoModelForSeq2SeqLM.from_pretrained(
+                MODEL_NAME,
+                torch_dtype = torch.float16 if device == 0 else torch.float32,
+            ).to("cuda" if device == 0 else "cpu")
+            model.eval()
+            
+            # Заменяем слои внимания на fused-реализацию BetterTransformer
+            try:
+                from optimum.bettertransformer import BetterTransformer
+                
+                model = BetterTransformer.transform(model, keep_original_model = False)
+            except Exception as e:
+                print(f"BetterTransformer не применен: {e}")
+            
+            # На CPU квантизуем линейные слои в int8
+            if device_name == "CPU":
+                model = torch.quantization.quantize_dynamic(
+                    model,
+                    {torch.nn.Linear},
+                    dtype = torch.qint8
+                )
+            
+            # Компилируем forward модели, который generate вызывает на каждом шаге декодирования.
+            # Режим без CUDA-графов: KV-кэш растет на каждом шаге, и графы пришлось бы перезаписывать.
+            # Квантизованная модель на CPU не компилируется.
+            if COMPILE_MODEL and device_name == "GPU":
+                model.forward = torch.compile(
+                    model.forward,
+                    fullgraph = False,
+                    dynamic = True,  # Размер батча и длины последовательностей меняются от запроса к запросу
+                )
+            elif COMPILE_MODEL:
+                print("torch.compile для квантизованной модели на CPU не применяется")
+            
+            print("Модель успешно загружена")
         
     except Exception as e:
         print(f"Ошибка при загрузке модели: {e}")
-        # В случае ошибки оставляем summarizer как None
+        # В случае ошибки оставляем модель незагруженной
+        model = None
+        translator = None
+    
+    # Прогревочные прогоны: компиляция и инициализация выполняются до приема запросов
+    if model_loaded():
+        await warmup_model()
 
 @app.get("/")
 async def root():
@@ -126,8 +739,10 @@ async def health_check():
     # Эндпоинт для проверки состояния сервиса. Используется для мониторинга доступности API.
     
     return {
-        "status": "healthy" if summarizer is not None else "unhealthy",
-        "model_loaded": summarizer is not None,
+        "status": "healthy" if service_ready() else "unhealthy",
+        "model_loaded": model_loaded(),
+        "cache_hits": cache_hits,
+        "cache_cleanings": cache_cleanings,
         "timestamp": datetime.now().isoformat(),
     }
 
@@ -137,6 +752,10 @@ async def summarize(request: SummarizeRequest):
     Основной эндпоинт для суммаризации текста. 
     Принимает текст новости и возвращает краткое содержание.
     
+    Слишком короткие тексты (не длиннее запрошенной суммаризации или короче
+    минимальной длины генерации) возвращаются без изменений без вызова модели,
+    в этом случае model_used равно "passthrough", а compression_ratio - 1.0.
+    
     Args:
         request (SummarizeRequest): Объект запроса с текстом и параметрами
         
@@ -147,63 +766,138 @@ async def summarize(request: SummarizeRequest):
         HTTPException: Если модель не загружена или произошла ошибка
     """
     
-    # Проверяем, загружена ли модель
-    if summarizer is None:
+    # Проверяем, загружена ли модель и работает ли обработчик очереди
+    if not service_ready():
         raise HTTPException(
             status_code = 503,
             detail = "Модель не загружена. Сервис временно недоступен."
         )
     
     # Засекаем время начала обработки
-    start_time = time.time()
+    start_time = time.perf_counter()
     
     try:
-        # Выполняем суммаризацию
-        result = summarizer(
-            request.text,
-            max_length = min(100, request.max_length // 3),  # Преобразуем символы в слова
-            min_length = 20,
-            do_sample = False,
-        )
+        # Ответ возвращается готовым, response_model используется только для документации
+        return ORJSONResponse(await summarize_text(request.text, request.max_length, start_time))
         
-        # Получаем результат
-        summary = result[0]["summary_text"]
-        
-        # Вычисляем время обработки
-        processing_time = time.time() - start_time
-        
-        # Вычисляем метрики
-        original_length = len(request.text)
-        summary_length = len(summary)
-        compression_ratio = original_length / max(summary_length, 1)
-        
-        # Формируем ответ
-        response = SummarizeResponse(
-            summary = summary,
-            original_length = original_length,
-            summary_length = summary_length,
-            compression_ratio = round(compression_ratio, 2),
-            processing_time = round(processing_time, 3),
-            model_used = "rut5_base_sum_gazeta",
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    except Exception as e:
+        # Обрабатываем ошибки при суммаризации
+        raise HTTPException(
+            status_code = 500,
+            detail = f"Ошибка при обработке текста: {str(e)}"
         )
+
+@app.post("/summarize_batch", response_model = list[SummarizeResponse])
+async def summarize_batch(request: BatchRequest):
+    """
+    Пакетный эндпоинт суммаризации.
+    Принимает до 64 текстов в одном запросе и возвращает суммаризации
+    в том же порядке. Тексты, которых нет в кэше, обрабатываются одним
+    вызовом модели (батчами по BATCH_REQUEST_SIZE), короткие тексты и кэш
+    обрабатываются так же, как в /summarize.
+    
+    Args:
+        request (BatchRequest): Объект запроса со списком текстов и параметрами
         
-        return response
+    Returns:
+        list[SummarizeResponse]: Ответы в порядке входных текстов
+        
+    Raises:
+        HTTPException: Если модель не загружена или произошла ошибка
+    """
+    
+    # Проверяем, загружена ли модель
+    if not model_loaded():
+        raise HTTPException(
+            status_code = 503,
+            detail = "Модель не загружена. Сервис временно недоступен."
+        )
+    
+    # Засекаем время начала обработки
+    start_time = time.perf_counter()
+    
+    max_length = bucket_max_length(request.max_length // 3)  # Преобразуем символы в слова
+    summaries = [None] * len(request.texts)
+    models_used = ["rut5_base_sum_gazeta"] * len(request.texts)
+    missing = []  # Индексы текстов, которые нужно суммаризировать моделью
+    
+    for i, text in enumerate(request.texts):
+        if is_passthrough(text, request.max_length):
+            summaries[i] = text
+            models_used[i] = "passthrough"
+        else:
+            summaries[i] = cache_get(cache_key(text, max_length))
+            if summaries[i] is None:
+                missing.append(i)
+    
+    try:
+        if missing:
+            # Оставшиеся тексты суммаризируются в пуле инференса минимальным числом вызовов модели
+            generated = await asyncio.get_running_loop().run_in_executor(
+                INFER_POOL,
+                summarize_many,
+                [request.texts[i] for i in missing],
+                max_length,
+            )
+            
+            for i, summary in zip(missing, generated):
+                summaries[i] = summary
+                cache_put(cache_key(request.texts[i], max_length), summary)
         
     except Exception as e:
         # Обрабатываем ошибки при суммаризации
         raise HTTPException(
             status_code = 500,
-            detail = f"Ошибка при обработке текста: {str(e)}"
+            detail = f"Ошибка при обработке текстов: {str(e)}"
+        )
+    
+    processing_time = time.perf_counter() - start_time
+    
+    # Ответ возвращается готовым, response_model используется только для документации
+    return ORJSONResponse([
+        build_response(text, summary, processing_time, model_used)
+        for text, summary, model_used in zip(request.texts, summaries, models_used)
+    ])
+
+@app.post("/summarize_stream")
+async def summarize_stream(request: SummarizeRequest):
+    """
+    Потоковый вариант эндпоинта суммаризации.
+    Возвращает текст суммаризации по частям в формате Server-Sent Events,
+    каждое событие содержит JSON-строку с очередным фрагментом. Если генерация
+    завершилась ошибкой, последним отправляется событие error с ее описанием.
+    
+    Args:
+        request (SummarizeRequest): Объект запроса с текстом и параметрами
+        
+    Returns:
+        StreamingResponse: Поток событий text/event-stream
+        
+    Raises:
+        HTTPException: Если модель не загружена
+    """
+    
+    # Проверяем, загружена ли модель
+    if not model_loaded():
+        raise HTTPException(
+            status_code = 503,
+            detail = "Модель не загружена. Сервис временно недоступен."
         )
+    
+    return StreamingResponse(
+        stream_summary(request.text, bucket_max_length(request.max_length // 3)),
+        media_type = "text/event-stream",
+    )
 
 # Точка входа для запуска сервера
 if __name__ == "__main__":
     # Запуск сервера разработки при прямом выполнении файла. В продакшене используется uvicorn через командную строку.
     
+    # Для запуска нескольких воркеров uvicorn требуется строка импорта приложения
     uvicorn.run(
-        app,
+        "main:app",
         host = "0.0.0.0",
         port = 8000,
+        workers = int(os.getenv("WEB_CONCURRENCY", "1")),
         log_level = "info"
     )
\ No newline at end of file
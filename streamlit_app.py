@@ -3,6 +3,7 @@
 # Импорт необходимых библиотек
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
 import json
 from datetime import datetime
 
@@ -14,6 +15,20 @@ st.set_page_config(
     initial_sidebar_state = "expanded"
 )
 
+@st.cache_resource
+def _session():
+    """
+    Общая HTTP-сессия. Создается один раз на процесс, а не при каждом
+    перезапуске скрипта, поэтому keep-alive соединения переиспользуются.
+    
+    Returns:
+        requests.Session: Сессия с пулом соединений
+    """
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_connections = 4, pool_maxsize = 8))
+    session.mount("https://", HTTPAdapter(pool_connections = 4, pool_maxsize = 8))
+    return session
+
 # Применение пользовательских стилей CSS
 st.markdown("""
 <style>
@@ -59,6 +74,18 @@ def main():
             help = "Желаемая длина итогового текста"
         )
         
+        # Переключатель пакетного режима
+        batch_mode = st.checkbox(
+            "Пакетный режим",
+            help = "Несколько новостей, разделенных строкой ---, суммаризируются одним запросом"
+        )
+        
+        # Переключатель потокового вывода
+        stream_mode = st.checkbox(
+            "Потоковый вывод",
+            help = "Текст суммаризации появляется по мере генерации, без метрик"
+        )
+        
         # Кнопка для проверки подключения к API
         if st.button("Проверить подключение", use_container_width=True):
             check_connection(api_url)
@@ -76,27 +103,69 @@ def main():
     
     # Отображение статистики текста
     if text_input:
+        chars, words, sentences = _text_stats(text_input)
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            st.metric("Символов", len(text_input))
+            st.metric("Символов", chars)
         
         with col2:
-            st.metric("Слов", len(text_input.split()))
+            st.metric("Слов", words)
         
         with col3:
-            sentences = text_input.count('.') + text_input.count('!') + text_input.count('?')
             st.metric("Предложений", sentences)
     
     # Кнопка для запуска суммаризации
     if st.button("Суммаризировать", type = "primary", use_container_width = True):
+        if batch_mode:
+            # Разделение ввода на отдельные новости
+            texts = [text.strip() for text in text_input.split("---") if text.strip()]
+            
+            if not texts or any(len(text) < 50 for text in texts):
+                st.warning("Каждая новость должна содержать не менее 50 символов")
+            elif len(texts) > 64:
+                st.warning("В пакетном режиме можно обработать не более 64 новостей")
+            else:
+                perform_batch_summarization(api_url, texts, max_length)
+        
         # Проверка минимальной длины текста
-        if not text_input or len(text_input) < 50:
+        elif not text_input or len(text_input) < 50:
             st.warning("Пожалуйста, введите текст длиной не менее 50 символов")
+        elif stream_mode:
+            perform_streaming_summarization(api_url, text_input, max_length)
         else:
             # Вызов функции для выполнения суммаризации
             perform_summarization(api_url, text_input, max_length)
 
+@st.cache_data(max_entries = 32)
+def _text_stats(text):
+    """
+    Подсчет статистики текста. Кэшируется, чтобы не пересчитывать
+    ее при каждом перезапуске скрипта Streamlit.
+    
+    Args:
+        text (str): Текст новости
+        
+    Returns:
+        tuple: Число символов, слов и предложений
+    """
+    sentences = text.count('.') + text.count('!') + text.count('?')
+    return len(text), len(text.split()), sentences
+
+@st.cache_data(ttl = 10)
+def _health(api_url):
+    """
+    Запрос состояния API сервера. Ответ кэшируется на 10 секунд.
+    
+    Args:
+        api_url (str): URL адрес API сервера
+        
+    Returns:
+        tuple: Код ответа и данные эндпоинта health (None при ошибке)
+    """
+    response = _session().get(f"{api_url}/health", timeout = 5)
+    return response.status_code, response.json() if response.status_code == 200 else None
+
 def check_connection(api_url):
     """
     Проверка доступности API сервера.
@@ -106,20 +175,64 @@ def check_connection(api_url):
     """
     try:
         # Отправка GET запроса на эндпоинт health
-        response = requests.get(f"{api_url}/health", timeout = 5)
+        status_code, data = _health(api_url)
         
-        if response.status_code == 200:
-            data = response.json()
+        if status_code == 200:
             st.success(f"API доступен")
             st.info(f"Модель загружена: {data.get('model_loaded', False)}")
         else:
-            st.error(f"API недоступен. Код ошибки: {response.status_code}")
+            st.error(f"API недоступен. Код ошибки: {status_code}")
             
     except requests.exceptions.ConnectionError:
         st.error("Не удалось подключиться к API. Проверьте URL и убедитесь, что сервер запущен.")
     except Exception as e:
         st.error(f"Ошибка подключения: {str(e)[:100]}")
 
+def display_result(result):
+    """
+    Отображение результата суммаризации и его метрик.
+    
+    Args:
+        result (dict): Ответ API эндпоинта summarize
+    """
+    # Отображение результата в стилизованном блоке
+    st.markdown('<div class="result-box">', unsafe_allow_html=True)
+    st.subheader("Результат суммаризации")
+    st.write(result['summary'])
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Отображение метрик в колонках
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric(
+            "Коэффициент сжатия",
+            f"{result['compression_ratio']:.1f}x"
+        )
+    
+    with col2:
+        st.metric(
+            "Время обработки",
+            f"{result['processing_time']:.2f}с"
+        )
+    
+    with col3:
+        compression_percent = 100 - (100 / result['compression_ratio'])
+        st.metric(
+            "Сокращение текста",
+            f"{compression_percent:.0f}%"
+        )
+    
+    with col4:
+        st.metric(
+            "Использованная модель",
+            result['model_used'].split('/')[-1][:10]
+        )
+    
+    # Дополнительная информация в раскрывающемся блоке
+    with st.expander("Детальная информация"):
+        st.json(result)
+
 def perform_summarization(api_url, text, max_length):
     """
     Выполнение запроса на суммаризацию текста через API.
@@ -139,7 +252,7 @@ def perform_summarization(api_url, text, max_length):
             }
             
             # Отправка POST запроса на эндпоинт summarize
-            response = requests.post(
+            response = _session().post(
                 f"{api_url}/summarize",
                 json = payload,
                 timeout = 30 # Таймаут 30 секунд
@@ -149,43 +262,7 @@ def perform_summarization(api_url, text, max_length):
             if response.status_code == 200:
                 result = response.json()
                 
-                # Отображение результата в стилизованном блоке
-                st.markdown('<div class="result-box">', unsafe_allow_html=True)
-                st.subheader("Результат суммаризации")
-                st.write(result['summary'])
-                st.markdown('</div>', unsafe_allow_html=True)
-                
-                # Отображение метрик в колонках
-                col1, col2, col3, col4 = st.columns(4)
-                
-                with col1:
-                    st.metric(
-                        "Коэффициент сжатия",
-                        f"{result['compression_ratio']:.1f}x"
-                    )
-                
-                with col2:
-                    st.metric(
-                        "Время обработки",
-                        f"{result['processing_time']:.2f}с"
-                    )
-                
-                with col3:
-                    compression_percent = 100 - (100 / result['compression_ratio'])
-                    st.metric(
-                        "Сокращение текста",
-                        f"{compression_percent:.0f}%"
-                    )
-                
-                with col4:
-                    st.metric(
-                        "Использованная модель",
-                        result['model_used'].split('/')[-1][:10]
-                    )
-                
-                # Дополнительная информация в раскрывающемся блоке
-                with st.expander("Детальная информация"):
-                    st.json(result)
+                display_result(result)
             
             # Обработка ошибок API
             elif response.status_code == 503:
@@ -202,6 +279,119 @@ def perform_summarization(api_url, text, max_length):
         except Exception as e:
             st.error(f"Произошла ошибка: {str(e)[:100]}")
 
+def _stream_pieces(response):
+    """
+    Извлечение фрагментов текста из потока Server-Sent Events.
+    
+    Args:
+        response (requests.Response): Потоковый ответ эндпоинта summarize_stream
+        
+    Yields:
+        str: Очередной фрагмент суммаризации
+        
+    Raises:
+        RuntimeError: Если сервер сообщил об ошибке генерации (событие error)
+    """
+    response.encoding = "utf-8"
+    event = "message"
+    
+    for line in response.iter_lines(decode_unicode = True):
+        if not line:
+            # Пустая строка завершает событие
+            event = "message"
+        elif line.startswith("event: "):
+            event = line[len("event: "):]
+        elif line.startswith("data: "):
+            data = json.loads(line[len("data: "):])
+            if event == "error":
+                raise RuntimeError(data)
+            yield data
+
+def perform_streaming_summarization(api_url, text, max_length):
+    """
+    Выполнение суммаризации с выводом результата по мере генерации.
+    
+    Args:
+        api_url (str): URL адрес API сервера
+        text (str): Текст для суммаризации
+        max_length (int): Максимальная длина результата
+    """
+    try:
+        payload = {
+            "text": text,
+            "max_length": max_length
+        }
+        
+        # Отправка POST запроса с потоковым чтением ответа
+        with _session().post(
+            f"{api_url}/summarize_stream",
+            json = payload,
+            stream = True,
+            timeout = 30
+        ) as response:
+            if response.status_code == 200:
+                st.subheader("Результат суммаризации")
+                st.write_stream(_stream_pieces(response))
+            elif response.status_code == 503:
+                st.error("Модель не загружена. Дождитесь завершения загрузки или проверьте сервер.")
+            else:
+                st.error(f"Ошибка API: {response.status_code}")
+                st.code(response.text[:200])
+    
+    # Обработка исключения при таймауте
+    except requests.exceptions.Timeout:
+        st.error("Таймаут запроса. Возможно, модель еще загружается или текст слишком большой.")
+    
+    # Обработка других исключений
+    except Exception as e:
+        st.error(f"Произошла ошибка: {str(e)[:100]}")
+
+def perform_batch_summarization(api_url, texts, max_length):
+    """
+    Выполнение суммаризации нескольких текстов одним запросом.
+    Сервер обрабатывает тексты общими батчами модели.
+    
+    Args:
+        api_url (str): URL адрес API сервера
+        texts (list[str]): Тексты для суммаризации
+        max_length (int): Максимальная длина результата
+    """
+    with st.spinner(f"Выполняется суммаризация {len(texts)} текстов..."):
+        try:
+            # Подготовка данных для запроса
+            payload = {
+                "texts": texts,
+                "max_length": max_length
+            }
+            
+            # Отправка POST запроса на эндпоинт summarize_batch
+            response = _session().post(
+                f"{api_url}/summarize_batch",
+                json = payload,
+                timeout = 120 # Увеличенный таймаут для пакета текстов
+            )
+            
+            # Обработка успешного ответа
+            if response.status_code == 200:
+                for number, result in enumerate(response.json(), start = 1):
+                    st.markdown(f"#### Новость {number}")
+                    display_result(result)
+            
+            # Обработка ошибок API
+            elif response.status_code == 503:
+                st.error("Модель не загружена. Дождитесь завершения загрузки или проверьте сервер.")
+            else:
+                st.error(f"Ошибка API: {response.status_code}")
+                st.code(response.text[:200])
+                
+        # Обработка исключения при таймауте
+        except requests.exceptions.Timeout:
+            st.error("Таймаут запроса. Возможно, модель еще загружается или тексты слишком большие.")
+        
+        # Обработка других исключений
+        except Exception as e:
+            st.error(f"Произошла ошибка: {str(e)[:100]}")
+
 # Запуск основного приложения при выполнении файла
 if __name__ == "__main__":
     main()
\ No newline at end of file